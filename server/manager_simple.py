@@ -3,6 +3,7 @@
 """
 manager.py
 - '#ctrl' を受信して位置(x,y,theta)を更新
+  ({"t":"cmd","v":..} または {"t":"cmd_batch","v":[..]})
 - 更新後 '#state' を {"t":"state","x":..,"y":..,"theta":..} で返信
 - .env は user.py と同じ
 """
@@ -71,15 +72,23 @@ class ManagerNode:
 
     def _on_message(self, label: str, data: bytes):
         try:
-            txt = data.decode("utf-8")
-            msg = json.loads(txt)
+            msg = json.loads(data)  # bytes のまま渡して UTF-8 の検証は1回だけ
         except Exception:
             print("[MGR][RX] bad payload:", label, data)
             return
         print("[MGR][RX]", label, msg)
 
-        if label == self.ctrl and msg.get("t") == "cmd":
-            v = msg.get("v")
+        if label != self.ctrl:
+            return
+        t = msg.get("t")
+        if t == "cmd":
+            cmds = [msg.get("v")]
+        elif t == "cmd_batch":
+            # まとめて送られたコマンドは順に適用し、state は最後に1回だけ返す
+            cmds = msg.get("v") or []
+        else:
+            return
+        for v in cmds:
             if   v == "UP":    self.y -= self.step; self.theta = -math.pi/2
             elif v == "DOWN":  self.y += self.step; self.theta =  math.pi/2
             elif v == "LEFT":  self.x -= self.step; self.theta =  math.pi
@@ -87,7 +96,7 @@ class ManagerNode:
             # クリップ
             self.x = max(0, min(self.x, self.max_w))
             self.y = max(0, min(self.y, self.max_h))
-            self._send_state()
+        self._send_state()
 
     def _send_state(self):
         if not self._ready.get(self.state, False):
@@ -3,20 +3,48 @@
 """
 user.py
 - Tk の ↑←→↓ ボタン/矢印キーで {"t":"cmd","v":"UP|DOWN|LEFT|RIGHT"} を DataChannel '#ctrl' に送信
+  (20ms 以内に複数押された場合は {"t":"cmd_batch","v":[...]} にまとめる)
 - DataChannel '#state' を受信して、キャンバス上のロボット位置/向きを更新
 - .env 例:
     SORA_SIGNALING_URLS=wss://sora2.uclab.jp:5000/signaling
     SORA_CHANNEL_ID=sora
     SORA_CTRL_LABEL="#ctrl"
     SORA_STATE_LABEL="#state"
+    LOG_LEVEL=DEBUG          # [TX]/[RX] のログを出す場合
 """
-import json, os, math, queue
-from threading import Event
-from typing import Any, Optional, Callable
+from __future__ import annotations
+
+import json, os, math, logging, time, queue
+from array import array
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING, Any, Optional, Callable
 
 import tkinter as tk
 from dotenv import load_dotenv
-from sora_sdk import Sora, SoraConnection, SoraSignalingErrorCode
+
+if TYPE_CHECKING:
+    # sora_sdk の読み込みは重いので、実行時は Messaging の生成時まで遅らせる
+    from sora_sdk import SoraConnection, SoraSignalingErrorCode
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json を使う
+    orjson = None
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads  # bytes もそのまま受け付ける
+
+logger = logging.getLogger("user")
+
+# 矢印コマンドは4種類しかないので、送信用の bytes を事前に作っておく
+_CMD_BYTES = {d: _dumps({"t": "cmd", "v": d}) for d in ("UP", "DOWN", "LEFT", "RIGHT")}
 
 
 # ========== 描画パラメータ ==========
@@ -27,6 +55,20 @@ ROBOT_R = 16           # 機体サイズ
 ROBOT_COLOR = "#2a6ef7"
 TRAIL_COLOR = "#999999" # 軌跡の色
 TRAIL_WIDTH = 12         # 軌跡の太さ
+TRAIL_CHUNK = 512        # 軌跡の線1本あたりの最大点数
+TRAIL_MAXLEN = 4096      # 保持する軌跡の最大点数 (古い点から捨てる)
+TRAIL_MIN_STEP = 0.5     # これより短い移動 [px] は軌跡に追加しない
+TICK_MS = 200            # DC 状態の監視間隔
+STATE_POLL_MS = 15       # state 受信中の確認間隔 (メインスレッド)
+STATE_IDLE_POLLS = 10    # この回数続けて空なら TICK_MS 間隔に落とす
+CTRL_BATCH_MS = 20       # この時間内のコマンドを1通にまとめて送る
+CMD_MIN_INTERVAL = 0.05  # 同じ方向のコマンドの最小送信間隔 [s] (キーリピート対策)
+
+# 機体の左右後端は先端から ±2.5 rad (加法定理用に cos/sin を事前計算)
+_cos = math.cos
+_sin = math.sin
+_WING_COS = _cos(2.5)
+_WING_SIN = _sin(2.5)
 
 
 # ========== Sora Messaging ==========
@@ -39,6 +81,8 @@ class Messaging:
         metadata: Optional[dict[str, Any]] = None,
         app_on_message: Optional[Callable[[str, bytes], None]] = None,
     ):
+        from sora_sdk import Sora
+
         self._data_channels = data_channels
         self._app_on_message = app_on_message
 
@@ -61,6 +105,10 @@ class Messaging:
         # ラベルごとの ready 状態
         self._sendable = {dc["label"]: False for dc in data_channels}
 
+        # 送信は専用スレッドで行い、Tk のメインスレッドをブロックしない
+        self._tx_q: "queue.SimpleQueue[Optional[tuple[str, bytes]]]" = queue.SimpleQueue()
+        Thread(target=self._sender_loop, name="dc-sender", daemon=True).start()
+
         # コールバック
         self._conn.on_set_offer = self._on_set_offer
         self._conn.on_notify = self._on_notify
@@ -84,16 +132,32 @@ class Messaging:
 
     def disconnect(self):
         print("[SIG] disconnecting ...")
+        self._tx_q.put(None)
         self._conn.disconnect()
 
     def send_json(self, label: str, obj: dict):
+        self.send_bytes(label, _dumps(obj))
+
+    def send_bytes(self, label: str, b: bytes):
+        """エンコード済みの bytes を送信キューに積む (実際の送信は送信スレッド)"""
         if not self._sendable.get(label, False):
-            print(f"[TX] drop (dc '{label}' not ready):", obj)
+            logger.info("[TX] drop (dc '%s' not ready): %r", label, b)
             return
-        b = json.dumps(obj).encode("utf-8")
-        head = b[:64].decode("utf-8", errors="replace")
-        print(f"[TX] label={label}, bytes={len(b)}, head={head!r}")
-        self._conn.send_data_channel(label, b)
+        self._tx_q.put((label, b))
+
+    def _sender_loop(self):
+        while True:
+            item = self._tx_q.get()
+            if item is None:
+                break
+            label, b = item
+            # ログ用の整形は DEBUG 有効時のみ
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[TX] label=%s, bytes=%d, head=%r", label, len(b), b[:64].decode("utf-8", errors="replace"))
+            try:
+                self._conn.send_data_channel(label, b)
+            except Exception as e:
+                logger.warning("[TX] send failed on %s: %s", label, e)
 
     # --- handlers ---
     def _on_set_offer(self, raw: str):
@@ -119,11 +183,8 @@ class Messaging:
         print(f"[DC] ready: label={label}")
 
     def _on_message(self, label: str, data: bytes):
-        try:
-            txt = data.decode("utf-8", errors="replace")
-        except Exception:
-            txt = repr(data)
-        print(f"[RX] label={label}, data={txt}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[RX] label=%s, data=%s", label, data.decode("utf-8", errors="replace"))
         if self._app_on_message:
             self._app_on_message(label, data)
 
@@ -150,8 +211,10 @@ class UserApp:
         self.status = tk.StringVar(value="DC: CONNECTING...")
         self.pose   = tk.StringVar(value="x=?, y=?, θ=?")
         top = tk.Frame(root)
-        # UI更新用のキュー
-        self.ui_queue = queue.Queue()
+        # 最新の state だけを保持するスロット (受信スレッド → メインスレッド)
+        self._pending_state = None
+        self._pending_lock = Lock()
+        self._idle_polls = 0          # 続けて state が無かった確認回数
 
         top.grid(row=0, column=0, sticky="ew", padx=8, pady=6)
         tk.Label(top, textvariable=self.status).pack(anchor="w")
@@ -167,20 +230,35 @@ class UserApp:
         self.x = CANVAS_W * 0.5
         self.y = CANVAS_H * 0.5
         self.theta = 0.0
+        self._last_pose = None   # 最後に描画した (x, y, theta)
         self.robot_id = self.canvas.create_polygon(self._robot_points(),
                                                    fill=ROBOT_COLOR, outline="#123", width=1.5)
-        # 軌跡用
-        self.trail_points = [(self.x, self.y)]
-        self.trail_id = None
-        self._draw_trail()
+        # 軌跡用: 一定点数ごとの線 (item_id, x,y を平坦に並べた array) に分け、
+        # 最後の1本だけ更新する。古い線は TRAIL_MAXLEN を超えたら捨てる
+        # 点が1つだけの間は丸い点に見えるので、最初の追加まで隠しておく
+        flat = array('d', (self.x, self.y))
+        self._trail_chunks = deque([(self._create_trail_line(flat, hidden=True), flat)])
+        self._trail_hidden = True
+        self.canvas.tag_raise(self.robot_id)
 
         # 下段：ボタン
         bottom = tk.Frame(root)
         bottom.grid(row=2, column=0, pady=6)
-        tk.Button(bottom, text="↑", width=6, command=lambda: self._send_cmd("UP")).grid(row=0, column=1, padx=4, pady=4)
-        tk.Button(bottom, text="←", width=6, command=lambda: self._send_cmd("LEFT")).grid(row=1, column=0, padx=4, pady=4)
-        tk.Button(bottom, text="→", width=6, command=lambda: self._send_cmd("RIGHT")).grid(row=1, column=2, padx=4, pady=4)
-        tk.Button(bottom, text="↓", width=6, command=lambda: self._send_cmd("DOWN")).grid(row=2, column=1, padx=4, pady=4)
+        up_btn = tk.Button(bottom, text="↑", width=6, command=lambda: self._send_cmd("UP"))
+        left_btn = tk.Button(bottom, text="←", width=6, command=lambda: self._send_cmd("LEFT"))
+        right_btn = tk.Button(bottom, text="→", width=6, command=lambda: self._send_cmd("RIGHT"))
+        down_btn = tk.Button(bottom, text="↓", width=6, command=lambda: self._send_cmd("DOWN"))
+        up_btn.grid(row=0, column=1, padx=4, pady=4)
+        left_btn.grid(row=1, column=0, padx=4, pady=4)
+        right_btn.grid(row=1, column=2, padx=4, pady=4)
+        down_btn.grid(row=2, column=1, padx=4, pady=4)
+        self._buttons = (up_btn, left_btn, right_btn, down_btn)
+        self._btn_state = None   # 最後に適用した有効/無効
+
+        # 送信待ちのコマンド (CTRL_BATCH_MS ごとにまとめて送信)
+        self._ctrl_pending: list[str] = []
+        self._ctrl_flush_scheduled = False
+        self._last_send: dict[str, float] = {}
 
         # 矢印キー
         root.bind("<Up>",    lambda e: self._send_cmd("UP"))
@@ -189,109 +267,161 @@ class UserApp:
         root.bind("<Down>",  lambda e: self._send_cmd("DOWN"))
 
         # DC 状態を定期更新
+        self._last_status = None
         self._tick()
+        self._poll_state()
 
     # ---- UI helpers ----
     def _tick(self):
         if self.msg.closed:
-            self.status.set("DC: CLOSED")
-            self._set_buttons_state(False)
+            status, enable = "DC: CLOSED", False
         elif self.msg.data_channel_ready:
-            self.status.set("DC: OPEN")
-            self._set_buttons_state(True)
+            status, enable = "DC: OPEN", True
         else:
-            self.status.set("DC: CONNECTING...")
-            self._set_buttons_state(False)
-        # UI更新キューを処理
-        self._process_ui_queue()
-        self.root.after(200, self._tick)
+            status, enable = "DC: CONNECTING...", False
+        # 状態が変わったときだけウィジェットを更新
+        if status != self._last_status:
+            self._last_status = status
+            self.status.set(status)
+            self._set_buttons_state(enable)
+        self.root.after(TICK_MS, self._tick)
 
     def _set_buttons_state(self, enable: bool):
+        if enable == self._btn_state:
+            return
         state = tk.NORMAL if enable else tk.DISABLED
-        # ボタンは親フレームの children から探す
-        for child in self.root.grid_slaves(row=2, column=0):
-            for w in child.grid_slaves():
-                if isinstance(w, tk.Button):
-                    w.config(state=state)
+        for w in self._buttons:
+            w.config(state=state)
+        self._btn_state = enable
 
     def _send_cmd(self, direction: str):
-        self.msg.send_json(self.ctrl, {"t": "cmd", "v": direction})
+        # OS のキーリピートが速くても、方向ごとに CMD_MIN_INTERVAL に1回まで
+        now = time.monotonic()
+        if now - self._last_send.get(direction, 0.0) < CMD_MIN_INTERVAL:
+            return
+        self._last_send[direction] = now
+        self._ctrl_pending.append(direction)
+        if not self._ctrl_flush_scheduled:
+            self._ctrl_flush_scheduled = True
+            self.root.after(CTRL_BATCH_MS, self._flush_ctrl)
+
+    def _flush_ctrl(self):
+        pending, self._ctrl_pending = self._ctrl_pending, []
+        self._ctrl_flush_scheduled = False
+        if len(pending) == 1:
+            self.msg.send_bytes(self.ctrl, _CMD_BYTES[pending[0]])
+        elif pending:
+            self.msg.send_json(self.ctrl, {"t": "cmd_batch", "v": pending})
 
     def _draw_grid(self):
+        """グリッドは1枚の画像に描いて背景として置く (キャンバス上のアイテムは1個だけ)"""
+        w, h = CANVAS_W + 1, CANVAS_H + 1
+        img = tk.PhotoImage(master=self.canvas, width=w, height=h)
         for x in range(0, CANVAS_W + 1, GRID_STEP):
-            self.canvas.create_line(x, 0, x, CANVAS_H, fill="#eef1f6")
+            img.put("#eef1f6", to=(x, 0, x + 1, h))
         for y in range(0, CANVAS_H + 1, GRID_STEP):
-            self.canvas.create_line(0, y, CANVAS_W, y, fill="#eef1f6")
-        self.canvas.create_rectangle(1, 1, CANVAS_W - 1, CANVAS_H - 1, outline="#d0d3da")
+            img.put("#eef1f6", to=(0, y, w, y + 1))
+        # 外枠
+        img.put("#d0d3da", to=(1, 1, CANVAS_W, 2))
+        img.put("#d0d3da", to=(1, CANVAS_H - 2, CANVAS_W, CANVAS_H - 1))
+        img.put("#d0d3da", to=(1, 1, 2, CANVAS_H - 1))
+        img.put("#d0d3da", to=(CANVAS_W - 2, 1, CANVAS_W - 1, CANVAS_H - 1))
+        self._grid_image = img  # GC で消えないよう参照を保持
+        self.canvas.create_image(0, 0, image=img, anchor="nw")
 
     def _robot_points(self):
         # 三角形の向き: theta [rad]。先端 + 左 + 右 の3点
         r = ROBOT_R
-        tip = (self.x + math.cos(self.theta) * r,  self.y + math.sin(self.theta) * r)
-        left = (self.x + math.cos(self.theta + 2.5) * r * 0.75,
-                self.y + math.sin(self.theta + 2.5) * r * 0.75)
-        right = (self.x + math.cos(self.theta - 2.5) * r * 0.75,
-                 self.y + math.sin(self.theta - 2.5) * r * 0.75)
+        rw = r * 0.75
+        ct, st = _cos(self.theta), _sin(self.theta)
+        # cos(θ±2.5), sin(θ±2.5) は加法定理で求める
+        cc, ss, sc, cs = ct * _WING_COS, st * _WING_SIN, st * _WING_COS, ct * _WING_SIN
+        tip = (self.x + ct * r, self.y + st * r)
+        left = (self.x + (cc - ss) * rw, self.y + (sc + cs) * rw)
+        right = (self.x + (cc + ss) * rw, self.y + (sc - cs) * rw)
         return (*tip, *left, *right)
 
     def _redraw_robot(self):
         self.canvas.coords(self.robot_id, *self._robot_points())
 
-    def _draw_trail(self):
-        """ロボットの軌跡を描画する"""
-        if self.trail_id:
-            self.canvas.delete(self.trail_id)
-
-        if len(self.trail_points) < 2:
-            return
-
-        # 軌跡の線を描画し、IDを保存
-        self.trail_id = self.canvas.create_line(
-            self.trail_points, fill=TRAIL_COLOR, width=TRAIL_WIDTH, capstyle=tk.ROUND, smooth=True)
+    def _create_trail_line(self, flat, hidden=False):
+        # 1点しかない場合は同じ点を2回渡して線を作る
+        coords = list(flat) * 2 if len(flat) < 4 else list(flat)
+        return self.canvas.create_line(
+            *coords, fill=TRAIL_COLOR, width=TRAIL_WIDTH, capstyle=tk.ROUND, smooth=True,
+            state=tk.HIDDEN if hidden else tk.NORMAL)
+
+    def _append_trail(self, x, y):
+        """ロボットの軌跡に点を追加する (最後の線の座標だけを更新)"""
+        item, flat = self._trail_chunks[-1]
+        if len(flat) >= TRAIL_CHUNK * 2:
+            # 満杯の線はそのまま残し、その終点から次の線を始める
+            flat = array('d', flat[-2:])
+            item = self._create_trail_line(flat)
+            self._trail_chunks.append((item, flat))
+            # 上限を超えた古い線は丸ごと削除する
+            while len(self._trail_chunks) > TRAIL_MAXLEN // TRAIL_CHUNK:
+                old_item, _ = self._trail_chunks.popleft()
+                self.canvas.delete(old_item)
+        flat.extend((x, y))
+        self.canvas.coords(item, *flat)
+        if self._trail_hidden:
+            self.canvas.itemconfigure(item, state=tk.NORMAL)
+            self._trail_hidden = False
         # ロボットを最前面に表示
         self.canvas.tag_raise(self.robot_id)
 
-    def _process_ui_queue(self):
-        """UI更新キューを処理して、画面を更新する (メインスreadで実行)"""
-        while not self.ui_queue.empty():
-            try:
-                msg = self.ui_queue.get_nowait()
-            except queue.Empty:
-                break
+    def _poll_state(self):
+        # Tk の操作はすべてメインスレッドで行うため、受信スレッドからは予約せずここで拾う
+        # 受信が続いている間だけ短い間隔で確認し、途切れたら TICK_MS に戻す
+        if self._pending_state is not None:
+            self._drain_once()
+            self._idle_polls = 0
+        else:
+            self._idle_polls += 1
+        busy = self._idle_polls < STATE_IDLE_POLLS
+        self.root.after(STATE_POLL_MS if busy else TICK_MS, self._poll_state)
+
+    def _drain_once(self):
+        """最新の state だけを画面に反映する (_poll_state からメインスレッドで実行)"""
+        with self._pending_lock:
+            st, self._pending_state = self._pending_state, None
+        if st is None:
+            return
+        # 数値化 (失敗したらスキップ)
+        try:
+            x = float(st.get("x", self.x))
+            y = float(st.get("y", self.y))
+            th = float(st.get("theta", self.theta))
+        except Exception:
+            return
+        # 変化のない state は無視
+        if (x, y, th) == self._last_pose:
+            return
+        self._last_pose = (x, y, th)
+        self.x, self.y, self.theta = x, y, th
 
-            if msg['type'] == 'state_update':
-                st = msg['data']
-                # x, y, theta を更新
-                x = st.get("x", self.x)
-                y = st.get("y", self.y)
-                th = st.get("theta", self.theta)
-                # 数値化
-                try:
-                    self.x = float(x)
-                    self.y = float(y)
-                    self.theta = float(th)
-                except Exception:
-                    continue # 数値化に失敗したらスキップ
-
-                # 座標が変化した場合のみ軌跡の点を追加
-                if self.x != self.trail_points[-1][0] or self.y != self.trail_points[-1][1]:
-                    self.trail_points.append((self.x, self.y))
-
-                # 画面更新
-                self.pose.set(f"x={self.x:.1f}, y={self.y:.1f}, θ={self.theta:.2f}")
-                self._redraw_robot()
-                self._draw_trail()
+        # サブピクセルの揺れは軌跡に追加しない
+        last = self._trail_chunks[-1][1]
+        if math.hypot(x - last[-2], y - last[-1]) > TRAIL_MIN_STEP:
+            self._append_trail(x, y)
+
+        # 画面更新
+        self.pose.set(f"x={self.x:.1f}, y={self.y:.1f}, θ={self.theta:.2f}")
+        self._redraw_robot()
 
     # ---- 受信処理（Messaging から呼ばれる）----
     def on_state(self, label: str, data: bytes):
         if label != self.state:
             return
         try:
-            st = json.loads(data.decode("utf-8"))
+            st = _loads(data)
         except Exception:
             return  # 不正なデータの場合は何もしない
-        # UI更新は直接行わず、キューにタスクを投入する
-        self.ui_queue.put({'type': 'state_update', 'data': st})
+        # UI更新は直接行わず、最新の state としてスロットに置く (古いものは上書き)
+        # root には触れない: 別スレッドからの Tk 呼び出しはメインループを待ってブロックする
+        with self._pending_lock:
+            self._pending_state = st
 
     def _on_close(self):
         try:
@@ -303,6 +433,7 @@ class UserApp:
 # ========== エントリポイント ==========
 def main():
     load_dotenv()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="[%(levelname)s] %(message)s")
 
     raw = os.getenv("SORA_SIGNALING_URLS")
     if not raw:
@@ -320,17 +451,20 @@ def main():
         {"label": state, "direction": "sendrecv"},
     ]
 
-    # ❶ Messaging を先に作る
+    # ❶ 先に空のウィンドウを表示する (Sora SDK の読み込みを待たせない)
+    root = tk.Tk()
+    root.update()
+
+    # ❷ Messaging を作る (ここで sora_sdk を読み込む)
     msg = Messaging(urls, chid, dcs, meta, app_on_message=None)
 
-    # ❷ UI を作成し、Messaging を渡す
-    root = tk.Tk()
+    # ❸ UI を作成し、Messaging を渡す
     app = UserApp(root, messaging=msg, ctrl_label=ctrl, state_label=state)
 
-    # ❸ 受信コールバックをUIにバインド
+    # ❹ 受信コールバックをUIにバインド
     msg._app_on_message = app.on_state
 
-    # ❹ 接続してUI開始
+    # ❺ 接続してUI開始
     msg.connect()
     root.mainloop()
 
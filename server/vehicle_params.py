@@ -0,0 +1,14 @@
+"""Vehicle limits shared by manager.VehicleModel and fleet.VehicleFleet.
+
+Plain constants with no imports, so either model can use them without
+pulling in the other's dependencies.
+"""
+
+MAX_SPEED = 20.0  # m/s
+MAX_ACCEL = 9.0   # m/s^2 forward/back
+BRAKE_DECEL = 14.0
+COAST_DECEL = 2.0
+IDLE_DECEL = 1.5
+YAW_RATE_MAX = 2.5  # rad/s
+YAW_SLEW = 6.0      # rad/s^2
+ANGULAR_DAMP = 4.0